@@ -1,8 +1,13 @@
 import asyncio
+import functools
+import time
+from concurrent.futures import ThreadPoolExecutor
 from contextlib import asynccontextmanager
 
-from fastapi import FastAPI, HTTPException, Query
+import orjson
+from fastapi import FastAPI, HTTPException, Query, Response
 from fastapi.middleware.cors import CORSMiddleware
+from starlette.concurrency import run_in_threadpool
 
 from src.monitor_loop import run_monitor_loop
 from src.state import STATE
@@ -16,12 +21,20 @@ from src.utils.logger import log
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     log("API startup: launching monitor loop (LIVE TELEMETRY + RCA)")
-    
-    asyncio.create_task(asyncio.to_thread(run_monitor_loop))
+
+    # Dedicated single-thread executor: the monitor loop never returns,
+    # so keep it out of the default pool used by anyio / to_thread.
+    loop = asyncio.get_running_loop()
+    app.state.monitor_executor = ThreadPoolExecutor(
+        max_workers=1,
+        thread_name_prefix="etw-monitor",
+    )
+    loop.run_in_executor(app.state.monitor_executor, run_monitor_loop)
 
     yield
 
     log("API shutdown: application stopping")
+    app.state.monitor_executor.shutdown(wait=False)
 
 
 # -------------------------------------------------
@@ -52,18 +65,58 @@ app.add_middleware(
 )
 
 
+# -------------------------------------------------
+# RESPONSE CACHE
+# -------------------------------------------------
+
+def cache_by_rev(ttl: float = 0.25):
+    """
+    Cache a route's serialized JSON body per query params.
+    An entry is reused while STATE.revision() is unchanged and it is
+    younger than `ttl` seconds, so any state write invalidates it.
+
+    `fn` is a plain (sync) route body; it and the JSON encoding run in
+    the threadpool so large payloads never block the event loop.
+    """
+    def decorator(fn):
+        cache = {}
+
+        def render(kwargs):
+            return orjson.dumps(fn(**kwargs))
+
+        @functools.wraps(fn)
+        async def wrapper(**kwargs):
+            key = tuple(sorted(kwargs.items()))
+            rev = STATE.revision()
+            now = time.monotonic()
+
+            hit = cache.get(key)
+            if hit and hit[0] == rev and now - hit[1] < ttl:
+                body = hit[2]
+            else:
+                body = await run_in_threadpool(render, kwargs)
+                cache[key] = (rev, now, body)
+
+            return Response(content=body, media_type="application/json")
+
+        return wrapper
+
+    return decorator
+
+
 # -------------------------------------------------
 # SPIKE / RCA ROUTES
 # -------------------------------------------------
 
 @app.get("/api/spikes")
+@cache_by_rev(ttl=0.25)
 def get_spikes():
     """Returns all detected spikes (newest first)."""
     return {"spikes": STATE.get_spikes()}
 
 
 @app.get("/api/latest-rca")
-def get_latest_rca():
+async def get_latest_rca():
     """Returns the RCA attached to the most recent spike."""
     return {"latest_rca": STATE.get_latest_rca()}
 
@@ -88,7 +141,7 @@ def get_spike(spike_id: int):
 # -------------------------------------------------
 
 @app.get("/api/telemetry/latest")
-def telemetry_latest():
+async def telemetry_latest():
     """
     Very fast endpoint returning the latest CPU/RAM sample.
     Ideal for indicators or low-latency polling.
@@ -101,6 +154,7 @@ def telemetry_latest():
 
 
 @app.get("/api/telemetry/window")
+@cache_by_rev(ttl=0.25)
 def telemetry_window(
     seconds: int = Query(
         60,
@@ -1,10 +1,12 @@
 import os
-import json
+import orjson
 import psutil
 import subprocess
 import threading
+import time
 from collections import deque, defaultdict
-from datetime import datetime, timezone, timedelta
+from itertools import islice
+from datetime import datetime, timezone
 from typing import List, Dict, Any
 
 from .utils.logger import log
@@ -18,6 +20,27 @@ RETENTION_SECONDS = 100
 MAX_EVENTS = 10000
 MAX_EVENTS_PER_PID = 2000
 
+# Retention purge is amortized: run every N events or every T seconds
+PURGE_EVERY_EVENTS = 256
+PURGE_INTERVAL_SECONDS = 0.25
+
+# current_top_processes() reuses its process table snapshot for this long
+PROC_SNAPSHOT_TTL = 1.0
+
+# Binary pipe buffer for the tracer's newline-delimited JSON stream
+STDOUT_BUFFER_BYTES = 1024 * 1024
+
+# Upper bound on bytes pulled from the pipe per batch
+READ_CHUNK_BYTES = 64 * 1024
+
+# ETW session buffers passed to the tracer: per-buffer size, buffer count
+# (128 KB x 256 = 32 MB total) and how often it flushes to us. The 100 ms
+# flush drains buffers well before they fill; raise num_buffers for hosts
+# that still report lost events.
+ETW_BUFFER_SIZE_KB = 128
+ETW_NUM_BUFFERS = 256
+ETW_FLUSH_INTERVAL_MS = 100
+
 ETW_EXE_DEFAULT = os.path.join(
     os.path.dirname(os.path.dirname(__file__)),
     "windows",
@@ -28,6 +51,106 @@ ETW_EXE_DEFAULT = os.path.join(
     "EtwKernelTracer.exe",
 )
 
+DOTNET_RUNTIME_PROVIDER = "Microsoft-Windows-DotNETRuntime"
+
+# Event classification bits, stored per event as "_flags" at ingest
+TASK_MEMORY = 1
+TASK_PROFILE = 2
+EVT_GC = 4
+EVT_THREAD = 8
+
+# ------------------------------------------
+# Helpers
+# ------------------------------------------
+
+def event_flags(type_lc: str, task: str, ename: str) -> int:
+    """Classification bitmask from an event's normalized strings."""
+    flags = 0
+
+    if task == "Memory":
+        flags |= TASK_MEMORY
+    if "Profile" in task:
+        flags |= TASK_PROFILE
+    if "GC" in ename:
+        flags |= EVT_GC
+    if "thread" in type_lc:
+        flags |= EVT_THREAD
+
+    return flags
+
+
+def _is_gc_event(ev: Dict[str, Any]) -> bool:
+    return (
+        ev["_flags"] & EVT_GC != 0
+        and ev.get("provider") == DOTNET_RUNTIME_PROVIDER
+    )
+
+
+def _is_page_fault(ev: Dict[str, Any]) -> bool:
+    return ev["_flags"] & TASK_MEMORY != 0
+
+
+def _sorted_desc(counts: Dict[Any, int]) -> Dict[Any, int]:
+    return dict(sorted(counts.items(), key=lambda x: x[1], reverse=True))
+
+
+def _decrement(counts: Dict[Any, int], key, amount: int):
+    left = counts.get(key, 0) - amount
+    if left > 0:
+        counts[key] = left
+    else:
+        counts.pop(key, None)
+
+# ------------------------------------------
+# Per-PID ring buffer
+# ------------------------------------------
+
+class RingBuf:
+    """
+    Fixed-capacity circular buffer. Storage is allocated once; pushing
+    past capacity overwrites the oldest slot instead of allocating.
+    """
+
+    __slots__ = ("buf", "head", "size")
+
+    def __init__(self, capacity: int):
+        self.buf = [None] * capacity
+        self.head = 0      # index of the oldest item
+        self.size = 0
+
+    def __len__(self):
+        return self.size
+
+    def push(self, item):
+        cap = len(self.buf)
+        self.buf[(self.head + self.size) % cap] = item
+
+        if self.size < cap:
+            self.size += 1
+        else:
+            self.head = (self.head + 1) % cap
+
+    def oldest(self):
+        return self.buf[self.head] if self.size else None
+
+    def popleft(self):
+        item = self.buf[self.head]
+        self.buf[self.head] = None
+        self.head = (self.head + 1) % len(self.buf)
+        self.size -= 1
+        return item
+
+    def tail(self, limit: int) -> List[Any]:
+        """Last `limit` items, oldest first."""
+        n = min(max(limit, 0), self.size)
+        cap = len(self.buf)
+        start = (self.head + self.size - n) % cap
+
+        if start + n <= cap:
+            return self.buf[start:start + n]
+
+        return self.buf[start:] + self.buf[:start + n - cap]
+
 # ------------------------------------------
 # ETW STREAM COLLECTOR
 # ------------------------------------------
@@ -38,25 +161,54 @@ class EtwStreamCollector:
 
     Capabilities:
     ---------------------
-    ✅ Rolling event buffer (global + per PID)
+    ✅ Rolling event buffer (global deque + per-PID ring buffers)
     ✅ Safe timestamp normalization
-    ✅ Schema hardening
+    ✅ Schema hardening (fixed-shape event dicts)
     ✅ Tracer crash detection + logging
-    ✅ Non-blocking stderr drain
+    ✅ stderr drained on its own pipe and thread
     ✅ Retention purging
-    ✅ Built-in RCA utilities
+    ✅ Built-in RCA utilities (O(1) running aggregates)
     """
 
-    def __init__(self, etw_exe_path: str = None):
+    def __init__(
+        self,
+        etw_exe_path: str = None,
+        buffer_size_kb: int = ETW_BUFFER_SIZE_KB,
+        num_buffers: int = ETW_NUM_BUFFERS,
+        flush_interval_ms: int = ETW_FLUSH_INTERVAL_MS,
+    ):
 
         self.etw_exe_path = etw_exe_path or ETW_EXE_DEFAULT
 
+        self.buffer_size_kb = buffer_size_kb
+        self.num_buffers = num_buffers
+        self.flush_interval_ms = flush_interval_ms
+
         self.events = deque(maxlen=MAX_EVENTS)
-        self.events_by_pid = defaultdict(lambda: deque(maxlen=MAX_EVENTS_PER_PID))
+        self.events_by_pid = defaultdict(lambda: RingBuf(MAX_EVENTS_PER_PID))
+
+        # Running RCA aggregates, kept in sync with self.events on
+        # append and eviction so the RCA getters never rescan the buffer.
+        self.counters = {
+            "context_switch": 0,
+            "gc_events": deque(),
+            "page_fault_events": deque(),
+            "net_by_pid": defaultdict(int),
+            "disk_by_pid": defaultdict(int),
+            "thread_starts_by_pid": defaultdict(int),
+        }
 
         self.proc: subprocess.Popen | None = None
         self._stop_flag = False
 
+        # Set once the tracer's output stream ends (exit, crash or stop())
+        self.closed = threading.Event()
+
+        self._events_since_purge = 0
+        self._last_purge_ts = time.monotonic()
+
+        self._proc_cache = (float("-inf"), [])
+
         self._reader_thread: threading.Thread | None = None
         self._stderr_thread: threading.Thread | None = None
 
@@ -74,11 +226,17 @@ class EtwStreamCollector:
 
         try:
             self.proc = subprocess.Popen(
-                [self.etw_exe_path],
+                [
+                    self.etw_exe_path,
+                    "--buffer-kb", str(self.buffer_size_kb),
+                    "--buffer-count", str(self.num_buffers),
+                    "--flush-ms", str(self.flush_interval_ms),
+                ],
                 stdout=subprocess.PIPE,
+                # Own pipe: stdout is block-buffered by the tracer while
+                # .NET stderr is not, so a shared pipe could split JSON lines
                 stderr=subprocess.PIPE,
-                text=True,
-                bufsize=1,
+                bufsize=STDOUT_BUFFER_BYTES,
             )
 
         except Exception as e:
@@ -109,84 +267,240 @@ class EtwStreamCollector:
             if self._stop_flag:
                 break
 
-            if line.strip():
-                log(f"[ETW STDERR] {line.strip()}")
+            text = line.decode("utf-8", errors="replace").strip()
+            if text:
+                log(f"[ETW STDERR] {text}")
 
     # ------------------------------------------
 
     def _stdout_reader_loop(self):
+        try:
+            self._consume_stdout()
+        finally:
+            # Wake anyone waiting on the stream (e.g. the monitor loop)
+            self.closed.set()
+
+            if not self._stop_flag:
+                log("⚠ ETW tracer output stream closed")
+
+    def _consume_stdout(self):
 
         if not self.proc or not self.proc.stdout:
             return
 
-        for line in self.proc.stdout:
+        # Hot loop: bind C-level callables to locals once so each event
+        # skips the repeated global/attribute lookups.
+        read1 = self.proc.stdout.read1
+        loads = orjson.loads
+        decode_error = orjson.JSONDecodeError
+        from_iso = datetime.fromisoformat
+        now = time.time
+        monotonic = time.monotonic
+        classify = event_flags
+
+        pending = b""
+
+        while True:
+            # read1 returns whatever the pipe has buffered (blocking only
+            # while it is empty), so each pass handles a batch of lines.
+            chunk = read1(READ_CHUNK_BYTES)
+            if not chunk:
+                break
 
             if self._stop_flag:
                 break
 
-            line = line.strip()
-            if not line:
-                continue
+            lines = (pending + chunk).split(b"\n")
+            pending = lines.pop()
+
+            batch = []
+
+            for line in lines:
+                line = line.rstrip(b"\r")
+                if not line:
+                    continue
+
+                try:
+                    ev = loads(line)
+                except decode_error:
+                    log(f"[ETW] {line.decode('utf-8', errors='replace').strip()}")
+                    continue
+
+                # ----------------------------------
+                # Timestamp normalization
+                # ----------------------------------
+                try:
+                    ts = from_iso(ev.get("ts")).timestamp()
+                except Exception:
+                    ts = now()
+
+                # ----------------------------------
+                # Schema hardening (fixed-shape event)
+                # ----------------------------------
+                payload = ev.get("payload")
+                event_type = ev.get("event_type", "unknown")
+                event_name = ev.get("event_name", "")
+                task = ev.get("task", "")
+
+                batch.append({
+                    "ts": ts,
+                    "ts_rel_ms": ev.get("ts_rel_ms"),
+                    "pid": ev.get("pid"),
+                    "tid": ev.get("tid"),
+                    "cpu": ev.get("cpu"),
+                    "event_type": event_type,
+
+                    "provider": ev.get("provider", "unknown"),
+                    "provider_guid": ev.get("provider_guid"),
+                    "event_name": event_name,
+                    "task": task,
+                    "opcode": ev.get("opcode"),
+                    "opcode_id": ev.get("opcode_id"),
+                    "level": ev.get("level"),
+                    "keywords": ev.get("keywords"),
+                    "version": ev.get("version"),
+                    "channel": ev.get("channel"),
+
+                    "activity_id": ev.get("activity_id"),
+                    "related_activity_id": ev.get("related_activity_id"),
+
+                    "payload_count": ev.get("payload_count"),
+                    "payload_size": ev.get("payload_size"),
+                    "payload": payload if isinstance(payload, dict) else {},
+
+                    "net_bytes": ev.get("net_bytes"),
+                    "disk_bytes": ev.get("disk_bytes"),
+                    "new_pid": ev.get("new_pid"),
+                    "new_tid": ev.get("new_tid"),
+                    "reason": ev.get("reason"),
+
+                    # Classified once here for every downstream matcher
+                    "_flags": classify(
+                        str(event_type).lower(), str(task), str(event_name)
+                    ),
+                })
 
-            try:
-                ev = json.loads(line)
-            except Exception:
-                log("Invalid JSON from ETW; line skipped")
+            if not batch:
                 continue
 
-            # --------------------------------------
-            # Timestamp normalization
-            # --------------------------------------
-            try:
-                ev_ts = ev.get("ts")
-                ev["ts"] = datetime.fromisoformat(ev_ts).astimezone(timezone.utc)
-            except Exception:
-                ev["ts"] = datetime.now(timezone.utc)
+            self._append_batch(batch)
 
             # --------------------------------------
-            # Schema hardening
+            # Purge old data (amortized, once per batch)
             # --------------------------------------
-            ev.setdefault("pid", None)
-            ev.setdefault("tid", None)
-            ev.setdefault("provider", "unknown")
-            ev.setdefault("event_type", "unknown")
-            ev.setdefault("event_name", "")
-            ev.setdefault("task", "")
-            ev.setdefault("payload", {})
+            self._events_since_purge += len(batch)
 
-            if not isinstance(ev["payload"], dict):
-                ev["payload"] = {}
+            if (
+                self._events_since_purge >= PURGE_EVERY_EVENTS
+                or monotonic() - self._last_purge_ts > PURGE_INTERVAL_SECONDS
+            ):
+                self._purge_old_events()
 
-            # --------------------------------------
-            # Append to buffers
-            # --------------------------------------
-            self.events.append(ev)
+    # ------------------------------------------
 
-            pid = ev.get("pid")
-            if pid is not None:
-                self.events_by_pid[pid].append(ev)
+    def _append_batch(self, batch: List[Dict[str, Any]]):
+        events = self.events
 
-            # --------------------------------------
-            # Purge old data
-            # --------------------------------------
-            self._purge_old_events()
+        if len(batch) > events.maxlen:
+            batch = batch[-events.maxlen:]
+
+        # Evict explicitly so running counters see every dropped event
+        overflow = len(events) + len(batch) - events.maxlen
+        for _ in range(overflow):
+            self._evict_oldest()
+
+        events.extend(batch)
+
+        count_in = self._count_in
+        events_by_pid = self.events_by_pid
+
+        for ev in batch:
+            count_in(ev)
+
+            pid = ev["pid"]
+            if pid is not None:
+                events_by_pid[pid].push(ev)
 
     # ------------------------------------------
 
     def _purge_old_events(self):
-        cutoff = datetime.now(timezone.utc) - timedelta(seconds=RETENTION_SECONDS)
+        self._events_since_purge = 0
+        self._last_purge_ts = time.monotonic()
+
+        cutoff = time.time() - RETENTION_SECONDS
 
         # Global queue
         while self.events and self.events[0]["ts"] < cutoff:
-            old = self.events.popleft()
+            self._evict_oldest()
+
+    def _evict_oldest(self):
+        old = self.events.popleft()
+        self._count_out(old)
+
+        pid = old.get("pid")
+        if pid in self.events_by_pid:
+            ring = self.events_by_pid[pid]
+            if ring and ring.oldest() is old:
+                ring.popleft()
+            if not ring:
+                del self.events_by_pid[pid]
+
+    # ------------------------------------------
+    # RUNNING AGGREGATES
+    # ------------------------------------------
+
+    def _count_in(self, ev: Dict[str, Any]):
+        c = self.counters
+
+        if _is_gc_event(ev):
+            c["gc_events"].append(ev)
+
+        if _is_page_fault(ev):
+            c["page_fault_events"].append(ev)
+
+        event_type = ev.get("event_type")
+        if event_type == "context_switch":
+            c["context_switch"] += 1
+        elif event_type == "thread_start":
+            c["thread_starts_by_pid"][ev.get("pid")] += 1
+
+        pid = ev.get("pid")
+        if pid is not None:
+            size = ev.get("net_bytes") or 0
+            if size:
+                c["net_by_pid"][pid] += size
+
+            size = ev.get("disk_bytes") or 0
+            if size:
+                c["disk_by_pid"][pid] += size
+
+    def _count_out(self, ev: Dict[str, Any]):
+        """Reverse _count_in for an event leaving the global buffer (FIFO)."""
+        c = self.counters
+
+        gc = c["gc_events"]
+        if gc and gc[0] is ev:
+            gc.popleft()
+
+        pf = c["page_fault_events"]
+        if pf and pf[0] is ev:
+            pf.popleft()
+
+        event_type = ev.get("event_type")
+        if event_type == "context_switch":
+            c["context_switch"] -= 1
+        elif event_type == "thread_start":
+            _decrement(c["thread_starts_by_pid"], ev.get("pid"), 1)
 
-            pid = old.get("pid")
-            if pid in self.events_by_pid:
-                dq = self.events_by_pid[pid]
-                if dq and dq[0] is old:
-                    dq.popleft()
-                if not dq:
-                    del self.events_by_pid[pid]
+        pid = ev.get("pid")
+        if pid is not None:
+            size = ev.get("net_bytes") or 0
+            if size:
+                _decrement(c["net_by_pid"], pid, size)
+
+            size = ev.get("disk_bytes") or 0
+            if size:
+                _decrement(c["disk_by_pid"], pid, size)
 
     # ------------------------------------------
 
@@ -205,34 +519,63 @@ class EtwStreamCollector:
     # ✅ PUBLIC QUERY APIS
     # ------------------------------------------
 
+    @staticmethod
+    def _export_event(ev: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Public copy of an event: internal "_" fields dropped and the
+        epoch ts rendered as ISO 8601 (UTC).
+        """
+        out = {k: v for k, v in ev.items() if not k.startswith("_")}
+        out["ts"] = datetime.fromtimestamp(ev["ts"], timezone.utc).isoformat()
+        return out
+
+    @staticmethod
+    def _tail(dq, limit: int) -> List[Dict[str, Any]]:
+        """Last `limit` items of a deque, oldest first, without copying the rest."""
+        tail = list(islice(reversed(dq), max(limit, 0)))
+        tail.reverse()
+        return tail
+
+    def export_events(self, events) -> List[Dict[str, Any]]:
+        """Public copies of internal events (see get_recent_raw_events)."""
+        return [self._export_event(ev) for ev in events]
+
     def get_recent_events(self, limit: int = 300) -> List[Dict[str, Any]]:
-        return list(self.events)[-limit:]
+        return self.export_events(self._tail(self.events, limit))
+
+    def get_recent_raw_events(self, limit: int = 300) -> List[Dict[str, Any]]:
+        """
+        Internal event dicts (epoch ts, "_flags"), oldest first, for
+        in-process consumers such as the PID ranker. They are shared with
+        the buffer: treat them as read-only and never hand them to the API.
+        """
+        return self._tail(self.events, limit)
 
     def get_events_by_pid(self, pid: int, limit: int = 500):
-        return list(self.events_by_pid.get(pid, []))[-limit:]
+        ring = self.events_by_pid.get(pid)
+        if ring is None:
+            return []
+
+        return [self._export_event(ev) for ev in ring.tail(limit)]
 
     # ------------------------------------------
     # RCA / HEURISTICS
     # ------------------------------------------
 
+    # The reader thread appends to / pops from these deques concurrently;
+    # list() copies them in one C call before the Python-level export.
+
     def detect_gc_events(self):
-        return [
-            ev for ev in self.events
-            if ev.get("provider") == "Microsoft-Windows-DotNETRuntime"
-            and "GC" in str(ev.get("event_name"))
-        ]
+        return [self._export_event(ev) for ev in list(self.counters["gc_events"])]
 
     def detect_page_faults(self):
         return [
-            ev for ev in self.events
-            if ev.get("task") == "Memory"
+            self._export_event(ev)
+            for ev in list(self.counters["page_fault_events"])
         ]
 
     def detect_cpu_contention(self):
-        switch_count = sum(
-            1 for ev in self.events
-            if ev.get("event_type") == "context_switch"
-        )
+        switch_count = self.counters["context_switch"]
 
         return {
             "context_switch_rate": round(switch_count / max(1, RETENTION_SECONDS), 2),
@@ -240,67 +583,90 @@ class EtwStreamCollector:
         }
 
     def aggregate_network_usage(self):
-        usage = defaultdict(int)
-
-        for ev in self.events:
-            size = ev.get("net_bytes") or 0
-            pid = ev.get("pid")
-
-            if size and pid is not None:
-                usage[pid] += size
-
-        return dict(sorted(usage.items(), key=lambda x: x[1], reverse=True))
+        return _sorted_desc(self.counters["net_by_pid"])
 
     def aggregate_disk_usage(self):
-        usage = defaultdict(int)
-
-        for ev in self.events:
-            size = ev.get("disk_bytes") or 0
-            pid = ev.get("pid")
-
-            if size and pid is not None:
-                usage[pid] += size
-
-        return dict(sorted(usage.items(), key=lambda x: x[1], reverse=True))
+        return _sorted_desc(self.counters["disk_by_pid"])
 
     def detect_thread_spikes(self):
-        counts = defaultdict(int)
+        return _sorted_desc(self.counters["thread_starts_by_pid"])
+
+    def build_rca_snapshot(self) -> Dict[str, Any]:
+        """
+        All RCA heuristics in one call, read from the running aggregates.
+        Each part is guarded on its own: a failing getter leaves an empty
+        value for that key instead of dropping the whole snapshot.
+        """
+        parts = (
+            ("gc_events", self.detect_gc_events, list),
+            ("page_faults", self.detect_page_faults, list),
+            ("cpu_contention", self.detect_cpu_contention, dict),
+            ("network_usage", self.aggregate_network_usage, dict),
+            ("disk_usage", self.aggregate_disk_usage, dict),
+            ("thread_spikes", self.detect_thread_spikes, dict),
+        )
+
+        snapshot = {}
 
-        for ev in self.events:
-            if ev.get("event_type") == "thread_start":
-                counts[ev.get("pid")] += 1
+        for key, getter, empty in parts:
+            try:
+                snapshot[key] = getter()
+            except Exception as e:
+                log(f"⚠ RCA heuristic '{key}' failed: {e}")
+                snapshot[key] = empty()
 
-        return dict(sorted(counts.items(), key=lambda x: x[1], reverse=True))
+        return snapshot
 
     # ------------------------------------------
     # OS PROCESS SNAPSHOT
     # ------------------------------------------
 
     def current_top_processes(self, top_n: int = 20):
+        """
+        Top processes by CPU. The sorted process table is cached for
+        PROC_SNAPSHOT_TTL seconds; cmdline is only read for the rows
+        actually returned.
+        """
+        now = time.monotonic()
+        taken_at, snapshot = self._proc_cache
+
+        if now - taken_at >= PROC_SNAPSHOT_TTL:
+            snapshot = []
+
+            for p in psutil.process_iter(
+                ["pid", "name", "cpu_percent", "memory_percent"]
+            ):
+
+                try:
+                    info = p.info
+
+                    snapshot.append((p, {
+                        "pid": info.get("pid"),
+                        "name": info.get("name"),
+                        "cpu_percent": info.get("cpu_percent"),
+                        "mem_percent": info.get("memory_percent"),
+                        "cmdline": None,
+                    }))
+
+                except Exception:
+                    continue
+
+            snapshot.sort(
+                key=lambda x: x[1].get("cpu_percent") or 0,
+                reverse=True
+            )
 
-        snapshot = []
-
-        for p in psutil.process_iter(
-            ["pid", "name", "cpu_percent", "memory_percent", "cmdline"]
-        ):
+            self._proc_cache = (now, snapshot)
 
-            try:
-                info = p.info
-
-                snapshot.append({
-                    "pid": info.get("pid"),
-                    "name": info.get("name"),
-                    "cpu_percent": info.get("cpu_percent"),
-                    "mem_percent": info.get("memory_percent"),
-                    "cmdline": " ".join(info.get("cmdline") or []),
-                })
+        top = []
 
-            except Exception:
-                continue
+        for proc, row in snapshot[:top_n]:
+            if row["cmdline"] is None:
+                try:
+                    row["cmdline"] = " ".join(proc.cmdline() or [])
+                except Exception:
+                    row["cmdline"] = ""
 
-        snapshot.sort(
-            key=lambda x: x.get("cpu_percent") or 0,
-            reverse=True
-        )
+            top.append(dict(row))
 
-        return snapshot[:top_n]
+        return top
@@ -1,10 +1,16 @@
+import copy
 import json
 import os
+import threading
 import time
 from pathlib import Path
 
+import fastjsonschema
+import orjson
 from google import genai
-from jsonschema import validate, ValidationError
+
+from ..utils.logger import log, debug, DEBUG
+from . import rca_cache
 
 # ---------------------------------------------------------
 # Gemini setup
@@ -18,12 +24,60 @@ SCHEMA_PATH = Path(__file__).parent / "gemini_schema.json"
 with open(SCHEMA_PATH, "r", encoding="utf-8") as f:
     SCHEMA = json.load(f)
 
+# SCHEMA is the function declaration; the response must match its
+# "parameters" JSON schema. Compiled once, so validating is a plain call.
+_validate = fastjsonschema.compile(SCHEMA["parameters"])
+
 TOOLS = [
     {
         "function_declarations": [SCHEMA]
     }
 ]
 
+# Constant part of the RCA prompt, built once at import
+PROMPT_HEADER = f"""
+You are a **Windows Server Root Cause Analysis AI – DIAGNOSTIC MODE**.
+
+Return **ONLY** a function call to:
+"{SCHEMA['name']}"
+
+Output must match the schema EXACTLY.
+
+"""
+
+# ---------------------------------------------------------
+# Short-lived RCA memo (identical prompt => reuse last RCA)
+# ---------------------------------------------------------
+
+RCA_MEMO_TTL_SECONDS = 60.0
+RCA_MEMO_MAX_ENTRIES = 32
+
+_rca_memo: dict[str, tuple[float, dict]] = {}
+_rca_memo_lock = threading.Lock()
+
+
+def _memo_get(key: str) -> dict | None:
+    with _rca_memo_lock:
+        hit = _rca_memo.get(key)
+
+        if hit is None:
+            return None
+
+        if time.monotonic() - hit[0] > RCA_MEMO_TTL_SECONDS:
+            del _rca_memo[key]
+            return None
+
+        return copy.deepcopy(hit[1])
+
+
+def _memo_put(key: str, rca: dict):
+    with _rca_memo_lock:
+        if len(_rca_memo) >= RCA_MEMO_MAX_ENTRIES:
+            oldest = min(_rca_memo, key=lambda k: _rca_memo[k][0])
+            del _rca_memo[oldest]
+
+        _rca_memo[key] = (time.monotonic(), copy.deepcopy(rca))
+
 # ---------------------------------------------------------
 # Helper
 # ---------------------------------------------------------
@@ -35,6 +89,12 @@ def _safe_float(val, default=0.0):
         return default
 
 
+def _json_block(obj) -> str:
+    return orjson.dumps(
+        obj, option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS
+    ).decode()
+
+
 def _fallback_rca(error: str) -> dict:
     """
     Guaranteed RCA so UI never shows empty state.
@@ -71,10 +131,6 @@ def _fallback_rca(error: str) -> dict:
 
 def analyze_root_cause(evidence: dict) -> dict:
 
-    print("\n" + "="*80)
-    print("🔥 BEGIN GEMINI RCA ANALYSIS")
-    print("="*80)
-
     ranked_lines = []
 
     for idx, proc in enumerate(
@@ -96,8 +152,15 @@ def analyze_root_cause(evidence: dict) -> dict:
         "No ranked PID candidates available."
 
 
-    evidence_summary_str = f"""
-* **Collected At:** {evidence.get("collected_at", "N/A")}
+    # Everything below "Collected At" is the stable evidence. Two spikes
+    # whose spike type / severity, CPU & RAM at confirm, context switch
+    # rate, GC / page fault / ETW event counts, top network / disk /
+    # thread PIDs and ranked candidate lines all render identically count
+    # as the same evidence; only that part keys the memo and the cache.
+    collected_line = f"""
+* **Collected At:** {evidence.get("collected_at", "N/A")}"""
+
+    stable_summary = f"""
 * **Spike Type:** {evidence.get('spike_info',{}).get('spike_type','unknown')}
 * **Severity Score:** {_safe_float(evidence.get('spike_info',{}).get('severity_score')):.2f}
 * **CPU at Spike Confirmation:** {_safe_float(evidence.get("cpu_at_confirm")):.1f}%
@@ -110,28 +173,40 @@ def analyze_root_cause(evidence: dict) -> dict:
 ---
 
 ### Network Usage
-{json.dumps(evidence.get("network_usage_top_pids",{}), indent=2)}
+{_json_block(evidence.get("network_usage_top_pids",{}))}
 
 ### Disk Usage
-{json.dumps(evidence.get("disk_usage_top_pids",{}), indent=2)}
+{_json_block(evidence.get("disk_usage_top_pids",{}))}
 
 ### Thread Spikes
-{json.dumps(evidence.get("thread_spikes",{}), indent=2)}
+{_json_block(evidence.get("thread_spikes",{}))}
 
 ### Ranked Candidate Processes
 {ranked_block}
 """
 
-    prompt = f"""
-You are a **Windows Server Root Cause Analysis AI – DIAGNOSTIC MODE**.
+    prompt = PROMPT_HEADER + collected_line + stable_summary + "\n"
 
-Return **ONLY** a function call to:
-"{SCHEMA['name']}"
+    # Prompt minus the volatile collection timestamp
+    key_prompt = PROMPT_HEADER + stable_summary
 
-Output must match the schema EXACTLY.
+    # One timestamp-free key for both the in-memory memo and the cache
+    cache_id = rca_cache.cache_key(MODEL, SCHEMA["name"], key_prompt)
 
-{evidence_summary_str}
-"""
+    cached = _memo_get(cache_id)
+    if cached is not None:
+        log("♻ RCA served from memo (identical evidence)")
+        return cached
+
+    stored = rca_cache.get(cache_id)
+    if stored is not None:
+        log("♻ RCA served from persistent cache")
+        _memo_put(cache_id, stored)
+        return stored
+
+    if rca_cache.CACHE_MODE == "replay":
+        log("⚠ RCA cache miss in replay mode — Gemini not called")
+        return _fallback_rca("No cached RCA for this evidence (replay mode).")
 
     # ---------------------------------------------------------
     # RETRY CONFIG
@@ -145,7 +220,7 @@ Output must match the schema EXACTLY.
     for attempt in range(1, MAX_RETRIES + 1):
 
         try:
-            print(f"\n🚀 Gemini request attempt {attempt}/{MAX_RETRIES}")
+            debug(f"🚀 Gemini request attempt {attempt}/{MAX_RETRIES}")
 
             response = client.models.generate_content(
                 model=MODEL,
@@ -153,10 +228,8 @@ Output must match the schema EXACTLY.
                 config={"tools": TOOLS}
             )
 
-            print("\n📥 RAW GEMINI RESPONSE:")
-            print("-"*80)
-            print(response)
-            print("-"*80)
+            if DEBUG:
+                debug(f"📥 RAW GEMINI RESPONSE:\n{response}")
 
             # ---------------------------------------------------------
             # Parse Function Call
@@ -167,44 +240,44 @@ Output must match the schema EXACTLY.
             except Exception:
                 raw_json = json.loads(response.text)
 
-            print("\n✅ FUNCTION CALL ARGS RECEIVED:")
-            print(json.dumps(raw_json, indent=2))
+            if DEBUG:
+                debug(f"✅ FUNCTION CALL ARGS RECEIVED:\n{_json_block(raw_json)}")
 
             # ---------------------------------------------------------
             # Schema validation
             # ---------------------------------------------------------
-            validate(instance=raw_json, schema=SCHEMA)
+            _validate(raw_json)
 
-            print("\n✅ SCHEMA VALIDATION PASSED")
+            debug("✅ SCHEMA VALIDATION PASSED")
             last_error = None
 
             break
 
-        except ValidationError as e:
+        except fastjsonschema.JsonSchemaException as e:
             last_error = f"Schema validation error: {e.message}"
-            print("❌", last_error)
+            log(f"❌ {last_error}")
 
         except Exception as e:
             last_error = str(e)
-            print("❌ Gemini error:", last_error)
+            log(f"❌ Gemini error: {last_error}")
 
         # ---------------------------------------------------------
         # Retry backoff
         # ---------------------------------------------------------
         if attempt < MAX_RETRIES:
             delay = BASE_DELAY * (2 ** (attempt - 1))
-            print(f"⏳ Retrying in {delay:.1f}s...\n")
+            log(f"⏳ Retrying in {delay:.1f}s...")
             time.sleep(delay)
 
         else:
-            print("\n🚨 Gemini RCA FAILED after max retries.")
+            log("🚨 Gemini RCA FAILED after max retries.")
 
 
     # ---------------------------------------------------------
     # Final fallback if everything failed
     # ---------------------------------------------------------
     if last_error:
-        print("\n⚠ FALLBACK RCA RETURNED")
+        log("⚠ FALLBACK RCA RETURNED")
         return _fallback_rca(last_error)
 
     # ---------------------------------------------------------
@@ -239,7 +312,9 @@ Output must match the schema EXACTLY.
             "Improve alert-response workflows."
         ]
 
-    print("\n🎉 RCA SUCCESSFULLY GENERATED")
-    print("="*80 + "\n")
+    _memo_put(cache_id, raw_json)
+    rca_cache.put(cache_id, raw_json)
+
+    debug("🎉 RCA SUCCESSFULLY GENERATED")
 
     return raw_json
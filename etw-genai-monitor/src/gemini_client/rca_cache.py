@@ -0,0 +1,80 @@
+import hashlib
+import os
+import sqlite3
+import time
+from contextlib import closing
+from pathlib import Path
+
+import orjson
+
+from ..utils.logger import log
+
+# ---------------------------------------------------------
+# Persistent RCA cache (SQLite)
+# ---------------------------------------------------------
+#
+# GEMINI_RCA_CACHE_MODE:
+#   enabled  - serve hits from the cache, call Gemini on a miss and store it
+#   replay   - serve hits from the cache, never call Gemini (miss => fallback)
+#   disabled - bypass the cache entirely
+#
+
+CACHE_MODES = ("enabled", "replay", "disabled")
+
+CACHE_MODE = os.getenv("GEMINI_RCA_CACHE_MODE", "enabled").strip().lower()
+if CACHE_MODE not in CACHE_MODES:
+    log(f"⚠ Unknown GEMINI_RCA_CACHE_MODE={CACHE_MODE!r}; using 'enabled'")
+    CACHE_MODE = "enabled"
+
+CACHE_PATH = Path(
+    os.getenv(
+        "GEMINI_RCA_CACHE_PATH",
+        Path(__file__).resolve().parents[2] / "rca_cache.sqlite3",
+    )
+)
+
+
+def cache_key(model: str, schema_name: str, prompt: str) -> str:
+    """SHA256 over everything that determines the model's answer."""
+    return hashlib.sha256(f"{model}|{schema_name}|{prompt}".encode()).hexdigest()
+
+
+def _connect() -> sqlite3.Connection:
+    conn = sqlite3.connect(CACHE_PATH, timeout=5.0)
+    conn.execute(
+        "CREATE TABLE IF NOT EXISTS rca ("
+        "key TEXT PRIMARY KEY, response BLOB NOT NULL, created_at REAL NOT NULL)"
+    )
+    return conn
+
+
+def get(key: str) -> dict | None:
+    if CACHE_MODE == "disabled":
+        return None
+
+    try:
+        with closing(_connect()) as conn:
+            row = conn.execute(
+                "SELECT response FROM rca WHERE key = ?", (key,)
+            ).fetchone()
+    except Exception as e:
+        log(f"⚠ RCA cache read failed: {e}")
+        return None
+
+    return orjson.loads(row[0]) if row else None
+
+
+def put(key: str, rca: dict):
+    if CACHE_MODE != "enabled":
+        return
+
+    try:
+        blob = orjson.dumps(rca, option=orjson.OPT_NON_STR_KEYS)
+
+        with closing(_connect()) as conn, conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO rca (key, response, created_at) VALUES (?, ?, ?)",
+                (key, blob, time.time()),
+            )
+    except Exception as e:
+        log(f"⚠ RCA cache write failed: {e}")
@@ -1,4 +1,9 @@
+import heapq
+import queue
 import time
+from concurrent.futures import ThreadPoolExecutor
+from operator import itemgetter
+
 import psutil
 
 from .utils.logger import log
@@ -10,9 +15,11 @@ from .pid_ranker import PidStatisticalRanker
 
 
 # ------------------------------------------------
-# Create ranker ONCE
+# Sampling cadence
 # ------------------------------------------------
-ranker = PidStatisticalRanker()
+# Slightly off 1 Hz so samples don't phase-lock with periodic OS work
+# (timer ticks, scheduler quanta, once-a-second housekeeping).
+SAMPLE_INTERVAL = 1.03
 
 
 # ------------------------------------------------
@@ -39,6 +46,153 @@ def _safe_list(x):
     return []
 
 
+def _top_n(counts: dict, n: int = 10) -> dict:
+    """
+    The n largest entries of a {pid: value} dict, largest first.
+    O(N log n) and no intermediate list of every item.
+    """
+    return dict(heapq.nlargest(n, counts.items(), key=itemgetter(1)))
+
+
+def _advance_deadline(deadline):
+    """
+    Next sample deadline and the time left until it. Sleeping toward a
+    fixed deadline absorbs the loop's own work time instead of adding
+    it to every interval; if we are already late, resync to now.
+    """
+    deadline += SAMPLE_INTERVAL
+    now = time.monotonic()
+
+    if deadline <= now:
+        return now, 0.0
+
+    return deadline, deadline - now
+
+
+def _wait_interval(etw, seconds, etw_alive) -> bool:
+    """
+    Wait out the sampling interval. While the tracer is alive this wakes
+    immediately if its stream ends (logged once). CPU/RAM sampling and
+    spike detection keep running either way; RCAs just see no new events.
+    Returns whether the tracer is still alive.
+    """
+    if not etw_alive:
+        time.sleep(seconds)
+        return False
+
+    if etw.closed.wait(timeout=seconds):
+        log("❌ ETW tracer stream ended — continuing with CPU/RAM telemetry only")
+        return False
+
+    return True
+
+
+# ------------------------------------------------
+# RCA WORKERS
+# ------------------------------------------------
+# Ranking and the Gemini call take seconds; they run here so the
+# sampling loop never stalls. The ETW evidence itself is captured by the
+# loop at spike time and handed over with the job. The queue is bounded so a
+# burst of spikes sheds RCAs instead of piling up memory.
+RCA_WORKERS = 2
+RCA_QUEUE_MAX = 8
+
+
+def _process_spike(ranker, spike_id, spike_events, snapshot, info):
+    """
+    Rank PIDs and run the Gemini RCA for one spike from the events and
+    telemetry snapshot captured when it fired, then attach the result to
+    its record.
+    """
+    # ------------------------------------------------
+    # 📊 STATISTICAL PID RANKING
+    # ------------------------------------------------
+    try:
+        ranked_candidates = ranker.rank_pids(
+            etw_events=spike_events,
+            spike_cpu=info["cpu_at_confirm"],
+            spike_ram=info["ram_at_confirm"],
+        )
+    except Exception as e:
+        log(f"⚠ PID ranking failed: {e}")
+        ranked_candidates = []
+
+    # ------------------------------------------------
+    # SAFE TELEMETRY EXTRACTION
+    # ------------------------------------------------
+    cpu_stats     = _safe_dict(snapshot.get("cpu_contention"))
+    net_usage     = _safe_dict(snapshot.get("network_usage"))
+    disk_usage    = _safe_dict(snapshot.get("disk_usage"))
+    thread_spikes = _safe_dict(snapshot.get("thread_spikes"))
+
+    gc_events   = _safe_list(snapshot.get("gc_events"))
+    page_faults = _safe_list(snapshot.get("page_faults"))
+
+    # ------------------------------------------------
+    # 🧠 RCA EVIDENCE ASSEMBLY
+    # ------------------------------------------------
+    evidence = {
+        "collected_at": iso_now(),
+
+        "cpu_at_confirm": info["cpu_at_confirm"],
+        "ram_at_confirm": info["ram_at_confirm"],
+
+        "spike_info": info,
+        "ranked_pid_candidates": ranked_candidates,
+
+        "cpu_contention": cpu_stats,
+        "network_usage_top_pids": _top_n(net_usage),
+        "disk_usage_top_pids": _top_n(disk_usage),
+        "thread_spikes": _top_n(thread_spikes),
+
+        "gc_event_count": len(gc_events),
+        "page_fault_event_count": len(page_faults),
+        "etw_events_count": len(spike_events),
+    }
+
+    # ------------------------------------------------
+    # 🤖 GEMINI RCA INVOCATION
+    # ------------------------------------------------
+    try:
+        log("🤖 Sending enriched RCA evidence to Gemini...")
+        rca = analyze_root_cause(evidence)
+        log("📨 Gemini RCA result received")
+
+        STATE.attach_rca(spike_id, rca)
+        log(f"✅ RCA attached to spike #{spike_id}")
+
+    except Exception as e:
+        log(f"❌ Gemini RCA FAILED — continuing loop: {e}")
+
+
+def _rca_worker(ranker, rca_queue):
+    while True:
+        job = rca_queue.get()
+
+        if job is None:
+            return
+
+        try:
+            _process_spike(ranker, *job)
+        except Exception as e:
+            log(f"❌ RCA worker error — continuing: {e}")
+
+
+def _stop_rca_workers(rca_queue, pool):
+    # Drop queued jobs so the stop sentinels always fit
+    while True:
+        try:
+            rca_queue.get_nowait()
+        except queue.Empty:
+            break
+
+    for _ in range(RCA_WORKERS):
+        rca_queue.put_nowait(None)
+
+    # In-flight Gemini calls finish on their own; don't block shutdown
+    pool.shutdown(wait=False)
+
+
 # ------------------------------------------------
 # MONITOR LOOP
 # ------------------------------------------------
@@ -56,12 +210,17 @@ def run_monitor_loop():
         log(f"❌ Failed to start ETW tracer: {e}")
         return
 
+    # ------------------------------------------------
+    # PID ranker (process handle cache lives as long as this session)
+    # ------------------------------------------------
+    ranker = PidStatisticalRanker()
+
     # ------------------------------------------------
     # Spike detector
     # ------------------------------------------------
     detector = SpikeDetector(
         baseline_window=300,
-        sample_interval=1.0,
+        sample_interval=SAMPLE_INTERVAL,
         z_score=2.5,
         derivative_threshold=5.0,
         derivative_len=3,
@@ -70,6 +229,20 @@ def run_monitor_loop():
         ram_threshold=80.0,
     )
 
+    # ------------------------------------------------
+    # RCA worker pool
+    # ------------------------------------------------
+    rca_queue = queue.Queue(maxsize=RCA_QUEUE_MAX)
+    rca_pool = ThreadPoolExecutor(
+        max_workers=RCA_WORKERS, thread_name_prefix="rca-worker"
+    )
+
+    for _ in range(RCA_WORKERS):
+        rca_pool.submit(_rca_worker, ranker, rca_queue)
+
+    deadline = time.monotonic()
+    etw_alive = True
+
     try:
         while True:
 
@@ -91,6 +264,9 @@ def run_monitor_loop():
             # ------------------------------------------------
             STATE.add_telemetry(cpu, ram)
 
+            # Amortized: only scans the handle cache once a minute
+            ranker.evict_stale()
+
             detector.add_sample({
                 "ts": iso_now(),
                 "cpu": cpu,
@@ -103,7 +279,8 @@ def run_monitor_loop():
             triggered, info = detector.check()
 
             if not triggered:
-                time.sleep(1.0)
+                deadline, wait_for = _advance_deadline(deadline)
+                etw_alive = _wait_interval(etw, wait_for, etw_alive)
                 continue
 
             # ------------------------------------------------
@@ -122,92 +299,48 @@ def run_monitor_loop():
             # ------------------------------------------------
             # 📦 FORENSIC ETW SNAPSHOT
             # ------------------------------------------------
+            # Internal events (with "_flags") feed the ranker; the
+            # exported copies are what the API serves for this spike.
             try:
-                spike_events = etw.get_recent_events(limit=1500) or []
+                raw_events = etw.get_recent_raw_events(limit=1500) or []
+                spike_events = etw.export_events(raw_events)
             except Exception as e:
                 log(f"⚠ ETW snapshot failed: {e}")
+                raw_events = []
                 spike_events = []
 
             STATE.attach_events(spike_record.id, spike_events)
 
-            # ------------------------------------------------
-            # 📊 STATISTICAL PID RANKING
-            # ------------------------------------------------
-            try:
-                ranked_candidates = ranker.rank_pids(
-                    etw_events=spike_events,
-                    spike_cpu=info["cpu_at_confirm"],
-                    spike_ram=info["ram_at_confirm"],
-                )
-            except Exception as e:
-                log(f"⚠ PID ranking failed: {e}")
-                ranked_candidates = []
-
-            # ------------------------------------------------
-            # SAFE TELEMETRY EXTRACTION
-            # ------------------------------------------------
+            # Aggregates describe the buffer now, i.e. the same window as
+            # spike_events, not whenever a worker gets to the job
             try:
-                cpu_stats     = _safe_dict(etw.detect_cpu_contention())
-                net_usage     = _safe_dict(etw.aggregate_network_usage())
-                disk_usage    = _safe_dict(etw.aggregate_disk_usage())
-                thread_spikes = _safe_dict(etw.detect_thread_spikes())
+                snapshot = _safe_dict(etw.build_rca_snapshot())
             except Exception as e:
                 log(f"⚠ Telemetry aggregation failed: {e}")
-
-                cpu_stats = {}
-                net_usage = {}
-                disk_usage = {}
-                thread_spikes = {}
-
-            try:
-                gc_events   = _safe_list(etw.detect_gc_events())
-                page_faults = _safe_list(etw.detect_page_faults())
-            except Exception:
-                gc_events = []
-                page_faults = []
+                snapshot = {}
 
             # ------------------------------------------------
-            # 🧠 RCA EVIDENCE ASSEMBLY
-            # ------------------------------------------------
-            evidence = {
-                "collected_at": iso_now(),
-
-                "cpu_at_confirm": info["cpu_at_confirm"],
-                "ram_at_confirm": info["ram_at_confirm"],
-
-                "spike_info": info,
-                "ranked_pid_candidates": ranked_candidates,
-
-                "cpu_contention": cpu_stats,
-                "network_usage_top_pids": dict(list(net_usage.items())[:10]),
-                "disk_usage_top_pids": dict(list(disk_usage.items())[:10]),
-                "thread_spikes": dict(list(thread_spikes.items())[:10]),
-
-                "gc_event_count": len(gc_events),
-                "page_fault_event_count": len(page_faults),
-                "etw_events_count": len(spike_events),
-            }
-
-            # ------------------------------------------------
-            # 🤖 GEMINI RCA INVOCATION
+            # 🧵 HAND OFF RANKING + RCA TO THE WORKER POOL
             # ------------------------------------------------
             try:
-                log("🤖 Sending enriched RCA evidence to Gemini...")
-                rca = analyze_root_cause(evidence)
-                log("📨 Gemini RCA result received")
-
-                STATE.attach_rca(spike_record.id, rca)
-                log(f"✅ RCA attached to spike #{spike_record.id}")
-
-            except Exception as e:
-                log(f"❌ Gemini RCA FAILED — continuing loop: {e}")
+                rca_queue.put_nowait(
+                    (spike_record.id, raw_events, snapshot, info)
+                )
+            except queue.Full:
+                log(
+                    f"⚠ RCA backlog full ({RCA_QUEUE_MAX}) — "
+                    f"skipping RCA for spike #{spike_record.id}"
+                )
 
-            time.sleep(1.0)
+            deadline, wait_for = _advance_deadline(deadline)
+            etw_alive = _wait_interval(etw, wait_for, etw_alive)
 
     except Exception as e:
         log(f"❌ Monitor loop crashed: {e}")
 
     finally:
+        _stop_rca_workers(rca_queue, rca_pool)
+
         try:
             etw.stop()
         except Exception:
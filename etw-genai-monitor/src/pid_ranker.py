@@ -1,7 +1,52 @@
+import time
+
 import numpy as np
 import psutil
-from collections import defaultdict
-from statistics import median
+
+from .etw_stream_collector import (
+    EVT_GC,
+    EVT_THREAD,
+    TASK_MEMORY,
+    TASK_PROFILE,
+    event_flags,
+)
+
+
+# Minimum spacing between cpu_percent() reads for the same PID; faster
+# repeats return the last value (psutil measures since the previous call).
+CPU_SAMPLE_MIN_INTERVAL = 0.1
+
+# How often evict_stale() sweeps cached handles for exited processes
+STALE_EVICT_INTERVAL = 60.0
+
+
+# PIDs below all of these are dropped before scoring (fewer rows for the
+# median / covariance stages, and idle PIDs no longer skew them)
+PREFILTER_MIN_EVENTS = 5
+PREFILTER_MIN_PCT = 1.0
+
+
+# Shared per-PID feature matrix layout (column order matters: the
+# Z-score stage uses every column from ram_pct onward).
+FEATURES = (
+    "cpu_pct",
+    "ram_pct",
+    "event_rate",
+    "thread_rate",
+    "cpu_samples",
+    "page_faults",
+    "gc_events",
+    "net_bytes_log",
+    "disk_bytes_log",
+)
+
+FEATURE_INDEX = {name: i for i, name in enumerate(FEATURES)}
+
+# Event flag bit behind each per-event count column, in FEATURES order
+# (thread_rate, cpu_samples, page_faults, gc_events)
+_FLAG_BITS = np.array(
+    [EVT_THREAD, TASK_PROFILE, TASK_MEMORY, EVT_GC], dtype=np.uint8
+)
 
 
 # -------------------------
@@ -15,28 +60,43 @@ def _safe_float(x):
         return 0.0
 
 
-def _robust_z_score(val, med, mad):
-    mad = max(mad, 0.01)
-    return abs(val - med) / mad
+def _float_column(values):
+    """
+    float64 array from raw event values in one C call; None / NaN / inf
+    become 0. Falls back to per-value _safe_float only for odd types.
+    """
+    try:
+        col = np.array(values, dtype=np.float64)
+    except (TypeError, ValueError):
+        col = None
+
+    if col is None or col.ndim != 1:
+        col = np.array([_safe_float(v) for v in values], dtype=np.float64)
 
+    return np.nan_to_num(col, nan=0.0, posinf=0.0, neginf=0.0)
 
-def _cosine_similarity(a, b):
-    a, b = np.array(a, dtype=float), np.array(b, dtype=float)
 
-    na = np.linalg.norm(a)
-    nb = np.linalg.norm(b)
+def _cosine_similarity(rows, vec):
+    """
+    Cosine similarity of every row of `rows` (N, D) against `vec` (D,).
+    Rows (or a vec) with zero norm score 0.
+    """
+    M = np.asarray(rows, dtype=float)
+    v = np.asarray(vec, dtype=float)
 
-    if na == 0 or nb == 0:
-        return 0.0
+    dots = M @ v
 
-    return float(np.dot(a, b) / (na * nb))
+    # Squared norms without linalg.norm dispatch; one sqrt per row
+    norms = np.sqrt(np.einsum("ij,ij->i", M, M) * np.vdot(v, v))
+
+    return np.divide(dots, norms, out=np.zeros_like(dots), where=norms > 0)
 
 
 def _mahalanobis_scores(matrix):
     """
     Robust Mahalanobis distance:
       - Median-based center
-      - Pseudo-inverse covariance
+      - Covariance solve (pseudo-inverse only as a fallback)
       - Diagonal ridge stabilizer (1e-3)
     """
     X = np.asarray(matrix, dtype=float)
@@ -47,25 +107,33 @@ def _mahalanobis_scores(matrix):
     center = np.median(X, axis=0)
     Xc = X - center
 
+    n, dim = Xc.shape
+
+    # Too few PIDs for a full-rank covariance: the ridge alone would
+    # govern most directions, so use per-feature (diagonal) variances
+    if n <= dim:
+        var = np.var(Xc, axis=0, ddof=1) + 1e-3
+        return np.sqrt((Xc * Xc / var).sum(axis=1))
+
     cov = np.cov(Xc, rowvar=False)
 
     if cov.ndim == 0:
         cov = np.array([[cov]])
 
-    dim = cov.shape[0]
-
     # ✅ stronger stabilization for real-world skew
-    cov += np.eye(dim) * 1e-3
-
-    cov_inv = np.linalg.pinv(cov)
+    cov += np.eye(cov.shape[0]) * 1e-3
 
-    dists = []
-    for row in Xc:
-        row = row.reshape(1, -1)
-        dist = float(row @ cov_inv @ row.T)
-        dists.append(np.sqrt(max(dist, 0.0)))
+    # Ridge makes cov positive definite: with cov = L L^T,
+    # x^T cov^-1 x == |L^-1 x|^2. pinv (SVD) only if that fails.
+    try:
+        L = np.linalg.cholesky(cov)
+        y = np.linalg.solve(L, Xc.T)
+        d2 = np.einsum("ij,ij->j", y, y)
+    except np.linalg.LinAlgError:
+        sol = Xc @ np.linalg.pinv(cov)
+        d2 = np.einsum("ij,ij->i", Xc, sol)
 
-    return np.array(dists, dtype=float)
+    return np.sqrt(np.maximum(d2, 0.0))
 
 
 def _lead_lag_score(global_series, pid_series, max_lag=5):
@@ -84,40 +152,36 @@ def _lead_lag_score(global_series, pid_series, max_lag=5):
     if n < 4:
         return 0.0
 
-    g, p = g[:n], p[:n]
+    g = g[:n] - g[:n].mean()
+    p = p[:n] - p[:n].mean()
 
-    g -= g.mean()
-    p -= p.mean()
+    # Prefix sums of squares -> O(1) norm of any overlapping segment
+    cg = np.concatenate(([0.0], np.cumsum(g * g)))
+    cp = np.concatenate(([0.0], np.cumsum(p * p)))
 
-    ng, np_ = np.linalg.norm(g), np.linalg.norm(p)
-    if ng == 0 or np_ == 0:
+    if cg[-1] == 0 or cp[-1] == 0:
         return 0.0
 
-    best_corr = 0.0
-    best_lag = 0
+    # Lags with at least 3 overlapping samples
+    lags = np.arange(-max_lag, max_lag + 1)
+    lags = lags[n - np.abs(lags) >= 3]
 
-    for lag in range(-max_lag, max_lag + 1):
+    # Only the +-max_lag window: zero-pad p and take the "valid" part,
+    # O(n * max_lag) instead of the O(n^2) full correlation.
+    # window[max_lag + lag] == dot(g_seg, p_seg) for every lag.
+    pad = np.zeros(max_lag)
+    window = np.correlate(np.concatenate((pad, p, pad)), g, mode="valid")
+    dots = window[max_lag + lags]
 
-        if lag < 0:
-            g_seg = g[-lag:]
-            p_seg = p[:n + lag]
-        elif lag > 0:
-            g_seg = g[:n - lag]
-            p_seg = p[lag:]
-        else:
-            g_seg = g
-            p_seg = p
+    g_sq = cg[n - np.maximum(lags, 0)] - cg[np.maximum(-lags, 0)]
+    p_sq = cp[n - np.maximum(-lags, 0)] - cp[np.maximum(lags, 0)]
+    denom = np.sqrt(g_sq * p_sq)
 
-        if len(g_seg) < 3:
-            continue
+    corrs = np.divide(dots, denom, out=np.zeros_like(dots), where=denom > 0)
 
-        corr = np.dot(g_seg, p_seg) / (
-            np.linalg.norm(g_seg) * np.linalg.norm(p_seg)
-        )
-
-        if corr > best_corr:
-            best_corr = corr
-            best_lag = lag
+    best = int(np.argmax(corrs))
+    best_corr = float(corrs[best])
+    best_lag = int(lags[best])
 
     if best_corr <= 0:
         return 0.0
@@ -139,6 +203,66 @@ class PidStatisticalRanker:
         self.weight_energy = 0.4
         self.weight_correlation = 0.2
 
+        # Live process handles reused across spikes, plus the last
+        # cpu_percent() reading per PID as (monotonic ts, value).
+        self._proc_cache: dict[int, psutil.Process] = {}
+        self._cpu_cache: dict[int, tuple[float, float]] = {}
+
+        self._last_evict = time.monotonic()
+
+    # ----------------------------------------------------
+
+    def _get_process(self, pid):
+        proc = self._proc_cache.get(pid)
+
+        # is_running() also detects PID reuse (create_time mismatch)
+        if proc is not None and not proc.is_running():
+            self._forget(pid)
+            proc = None
+
+        if proc is None:
+            proc = psutil.Process(pid)
+            self._proc_cache[pid] = proc
+
+        return proc
+
+    def _forget(self, pid):
+        self._proc_cache.pop(pid, None)
+        self._cpu_cache.pop(pid, None)
+
+    def evict_stale(self, now=None):
+        """
+        Drop cached handles of processes that have exited. Cheap to call
+        every loop iteration; the sweep runs once per STALE_EVICT_INTERVAL.
+        """
+        now = time.monotonic() if now is None else now
+
+        if now - self._last_evict < STALE_EVICT_INTERVAL:
+            return
+
+        self._last_evict = now
+
+        for pid, proc in list(self._proc_cache.items()):
+            try:
+                alive = proc.is_running()
+            except Exception:
+                alive = False
+
+            if not alive:
+                self._forget(pid)
+
+    def _cpu_percent(self, pid, proc):
+        now = time.monotonic()
+
+        last = self._cpu_cache.get(pid)
+        if last is not None and now - last[0] < CPU_SAMPLE_MIN_INTERVAL:
+            return last[1]
+
+        value = proc.cpu_percent(interval=None)
+        self._cpu_cache[pid] = (now, value)
+
+        return value
+
     # ----------------------------------------------------
 
     def rank_pids(
@@ -154,161 +278,176 @@ class PidStatisticalRanker:
         Main RCA ranking entry point.
         """
 
-        buckets = defaultdict(list)
-        for ev in etw_events:
-            pid = ev.get("pid")
-            if pid is not None:
-                buckets[pid].append(ev)
+        # ----------------------------------------------------
+        # Single pass over events -> columnar per-event features
+        # ----------------------------------------------------
 
-        if not buckets:
+        pid_list = []
+        flag_list = []
+        net_list = []
+        disk_list = []
+
+        for e in etw_events:
+            pid = e.get("pid")
+            if pid is None:
+                continue
+
+            # Collector events carry their classification bits from ingest
+            flags = e.get("_flags")
+            if flags is None:
+                flags = event_flags(
+                    str(e.get("event_type", "")).lower(),
+                    str(e.get("task", "")),
+                    str(e.get("event_name", "")),
+                )
+
+            pid_list.append(pid)
+            flag_list.append(flags)
+            net_list.append(e.get("net_bytes"))
+            disk_list.append(e.get("disk_bytes"))
+
+        if not pid_list:
             return []
 
-        pid_rows = []
+        # Columns: thread, profile, memory, gc, net_bytes, disk_bytes
+        flags_col = np.asarray(flag_list, dtype=np.uint8)
+
+        ev_feats = np.empty((len(pid_list), 6), dtype=float)
+        ev_feats[:, :4] = (flags_col[:, None] & _FLAG_BITS) != 0
+        ev_feats[:, 4] = _float_column(net_list)
+        ev_feats[:, 5] = _float_column(disk_list)
+
+        ev_pids = np.asarray(pid_list, dtype=np.int64)
+
+        # Group by PID in C: one stable sort, run boundaries from diff()
+        # (np.unique would sort the already-sorted PIDs a second time)
+        order = np.argsort(ev_pids, kind="stable")
+        sorted_pids = ev_pids[order]
+
+        starts = np.flatnonzero(np.diff(sorted_pids, prepend=sorted_pids[0] - 1))
+        counts = np.diff(starts, append=sorted_pids.size)
+        uniq_pids = sorted_pids[starts]
 
-        total_disk_bytes = 0.0
-        total_net_bytes = 0.0
+        per_pid = np.add.reduceat(ev_feats[order], starts, axis=0)
+
+        # Keep PIDs in first-seen order (matches event order)
+        groups = np.argsort(order[starts], kind="stable")
+
+        n = len(groups)
+
+        # Per-PID metadata for the final payload; numbers live in columns
+        pids = []
+        names = []
+        cmdlines = []
+        cpu_col = np.empty(n, dtype=np.float64)
+        ram_col = np.empty(n, dtype=np.float64)
 
         # ----------------------------------------------------
-        # Process snapshot + ETW metrics
+        # Process snapshot
         # ----------------------------------------------------
 
-        for pid, events in buckets.items():
+        for i, g in enumerate(groups):
+
+            pid = int(uniq_pids[g])
 
             try:
-                proc = psutil.Process(pid)
+                proc = self._get_process(pid)
 
-                name = proc.name()
-                cmdline = " ".join(proc.cmdline())
+                # ✅ one batched read of the process table entry
+                with proc.oneshot():
+                    name = proc.name()
+                    cmdline = " ".join(proc.cmdline())
 
-                # ✅ NON-BLOCKING CPU SAMPLING
-                cpu_pct = proc.cpu_percent(interval=None)
-                ram_pct = proc.memory_percent()
+                    # ✅ NON-BLOCKING CPU SAMPLING (throttled per PID)
+                    cpu_pct = self._cpu_percent(pid, proc)
+                    ram_pct = proc.memory_percent()
+
+            except Exception as e:
+                if isinstance(e, psutil.NoSuchProcess):
+                    self._forget(pid)
 
-            except Exception:
                 name = "Unknown"
                 cmdline = ""
                 cpu_pct = 0.0
                 ram_pct = 0.0
 
-            event_rate = len(events)
+            pids.append(pid)
+            names.append(name)
+            cmdlines.append(cmdline)
 
-            thread_rate = sum(
-                1 for e in events
-                if "thread" in str(e.get("event_type", "")).lower()
-            )
+            cpu_col[i] = round(_safe_float(cpu_pct), 2)
+            ram_col[i] = round(_safe_float(ram_pct), 2)
 
-            cpu_samples = sum(
-                1 for e in events
-                if "Profile" in str(e.get("task", ""))
-            )
 
-            page_faults = sum(
-                1 for e in events
-                if e.get("task") == "Memory"
-            )
+        # Energy shares stay relative to every PID's I/O, filtered or not
+        total_net_bytes = float(per_pid[:, 4].sum())
+        total_disk_bytes = float(per_pid[:, 5].sum())
 
-            gc_events = sum(
-                1 for e in events
-                if "GC" in str(e.get("event_name", ""))
-            )
 
-            net_bytes = sum(_safe_float(e.get("net_bytes")) for e in events)
-            disk_bytes = sum(_safe_float(e.get("disk_bytes")) for e in events)
-
-            total_disk_bytes += disk_bytes
-            total_net_bytes += net_bytes
+        # ----------------------------------------------------
+        # Prefilter: drop PIDs too quiet to be a culprit
+        # ----------------------------------------------------
 
-            pid_rows.append({
-                "pid": pid,
-                "name": name,
-                "cmdline": cmdline,
+        keep = np.flatnonzero(
+            (counts[groups] >= PREFILTER_MIN_EVENTS)
+            | (cpu_col >= PREFILTER_MIN_PCT)
+            | (ram_col >= PREFILTER_MIN_PCT)
+        )
 
-                "cpu_pct": round(cpu_pct, 2),
-                "ram_pct": round(ram_pct, 2),
+        # If no PID passes, rank them all rather than return nothing
+        if 0 < keep.size < n:
+            groups = groups[keep]
+            cpu_col = cpu_col[keep]
+            ram_col = ram_col[keep]
 
-                "event_rate": event_rate,
-                "thread_rate": thread_rate,
-                "cpu_samples": cpu_samples,
-                "page_faults": page_faults,
-                "gc_events": gc_events,
+            pids = [pids[i] for i in keep]
+            names = [names[i] for i in keep]
+            cmdlines = [cmdlines[i] for i in keep]
 
-                "net_bytes": round(net_bytes, 2),
-                "disk_bytes": round(disk_bytes, 2),
-            })
+            n = keep.size
 
 
         # ----------------------------------------------------
-        # Feature shaping
+        # ETW metrics + feature shaping -> shared (N, 9) matrix
         # ----------------------------------------------------
 
-        for p in pid_rows:
-            p["net_bytes_log"] = np.log1p(_safe_float(p["net_bytes"]))
-            p["disk_bytes_log"] = np.log1p(_safe_float(p["disk_bytes"]))
-
+        agg = per_pid[groups]
 
-        # ----------------------------------------------------
-        # Robust Z-score anomaly
-        # ----------------------------------------------------
-
-        anomaly_feats = [
-            "ram_pct",
-            "event_rate",
-            "thread_rate",
-            "cpu_samples",
-            "page_faults",
-            "gc_events",
-            "net_bytes_log",
-            "disk_bytes_log",
-        ]
+        net_bytes = np.round(agg[:, 4], 2)
+        disk_bytes = np.round(agg[:, 5], 2)
 
-        stats = {}
-        for feat in anomaly_feats:
-            vals = [_safe_float(p[feat]) for p in pid_rows]
-            med = median(vals)
-            mad = median(abs(v - med) for v in vals)
-            stats[feat] = (med, mad)
+        F = np.empty((n, len(FEATURES)), dtype=np.float64)
 
-        z_anomaly_raws = []
+        F[:, FEATURE_INDEX["cpu_pct"]] = cpu_col
+        F[:, FEATURE_INDEX["ram_pct"]] = ram_col
+        F[:, FEATURE_INDEX["event_rate"]] = counts[groups]
 
-        for p in pid_rows:
-            z_vals = []
-            for feat in anomaly_feats:
-                med, mad = stats[feat]
-                z_vals.append(_robust_z_score(_safe_float(p[feat]), med, mad))
+        # thread / profile / memory / gc flag counts, in FEATURES order
+        F[:, FEATURE_INDEX["thread_rate"]:FEATURE_INDEX["gc_events"] + 1] = agg[:, :4]
 
-            z_val = sum(z_vals) / len(z_vals)
-            p["z_anomaly"] = z_val
-            z_anomaly_raws.append(z_val)
+        F[:, FEATURE_INDEX["net_bytes_log"]] = np.log1p(net_bytes)
+        F[:, FEATURE_INDEX["disk_bytes_log"]] = np.log1p(disk_bytes)
 
 
         # ----------------------------------------------------
-        # Mahalanobis anomaly
+        # Robust Z-score anomaly (every feature except cpu_pct)
         # ----------------------------------------------------
 
-        mahal_feats = [
-            "cpu_pct",
-            "ram_pct",
-            "event_rate",
-            "thread_rate",
-            "cpu_samples",
-            "page_faults",
-            "gc_events",
-            "net_bytes_log",
-            "disk_bytes_log",
-        ]
+        A = F[:, FEATURE_INDEX["ram_pct"]:]
 
-        X = np.array(
-            [
-                [_safe_float(p[f]) for f in mahal_feats]
-                for p in pid_rows
-            ],
-            dtype=float
-        )
+        # Per-feature median / MAD over all PIDs, two C calls total
+        med = np.median(A, axis=0)
+        dev = np.abs(A - med)
+        mad = np.maximum(np.median(dev, axis=0), 0.01)
 
-        mahal_raws = _mahalanobis_scores(X)
+        z_anomaly_raws = (dev / mad).mean(axis=1)
 
-        for p, m in zip(pid_rows, mahal_raws):
-            p["mahalanobis"] = float(m)
+
+        # ----------------------------------------------------
+        # Mahalanobis anomaly (all features)
+        # ----------------------------------------------------
+
+        mahal_raws = _mahalanobis_scores(F)
 
 
         # ----------------------------------------------------
@@ -320,123 +459,113 @@ class PidStatisticalRanker:
         denom_disk = max(total_disk_bytes, 1.0)
         denom_net = max(total_net_bytes, 1.0)
 
-        energy_raws = []
-
-        for p in pid_rows:
-
-            cpu = min(_safe_float(p["cpu_pct"]) / denom_cpu, 1.5)
-            ram = min(_safe_float(p["ram_pct"]) / denom_ram, 1.5)
-            disk = min(_safe_float(p["disk_bytes"]) / denom_disk, 1.5)
-            net = min(_safe_float(p["net_bytes"]) / denom_net, 1.5)
-
-            energy = (
-                0.4 * cpu +
-                0.3 * ram +
-                0.15 * disk +
-                0.15 * net
-            )
-
-            p["energy_raw"] = energy
-            energy_raws.append(energy)
+        energy_raws = (
+            0.4 * np.minimum(cpu_col / denom_cpu, 1.5) +
+            0.3 * np.minimum(ram_col / denom_ram, 1.5) +
+            0.15 * np.minimum(disk_bytes / denom_disk, 1.5) +
+            0.15 * np.minimum(net_bytes / denom_net, 1.5)
+        )
 
 
         # ----------------------------------------------------
         # Correlation scoring
         # ----------------------------------------------------
 
-        corr_raws = []
-
-        for p in pid_rows:
-
-            pid_vec = [
-                _safe_float(p["cpu_pct"]),
-                _safe_float(p["ram_pct"]),
-                _safe_float(p["event_rate"]),
-                _safe_float(p["thread_rate"]),
-                _safe_float(p["cpu_samples"]),
-                _safe_float(p["page_faults"]),
-                _safe_float(p["gc_events"]),
-                _safe_float(p["net_bytes_log"]),
-                _safe_float(p["disk_bytes_log"]),
-            ]
+        spike_vec = [
+            spike_cpu, spike_ram,
+            1, 1, 1, 1, 1, 1, 1,
+        ]
 
-            spike_vec = [
-                spike_cpu, spike_ram,
-                1, 1, 1, 1, 1, 1, 1,
-            ]
+        # One mat-vec for all PIDs
+        cos_corrs = _cosine_similarity(F, spike_vec)
 
-            cos_corr = _cosine_similarity(pid_vec, spike_vec)
+        lead_scores = np.zeros(n, dtype=np.float64)
 
-            series = pid_cpu_series.get(p["pid"]) if pid_cpu_series else None
+        if pid_cpu_series:
+            for i, pid in enumerate(pids):
+                lead_scores[i] = _lead_lag_score(
+                    global_cpu_series, pid_cpu_series.get(pid)
+                )
 
-            lead_score = _lead_lag_score(global_cpu_series, series)
+        corr_raws = 0.7 * cos_corrs + 0.3 * lead_scores
 
-            corr = 0.7 * cos_corr + 0.3 * lead_score
 
-            p["cosine_correlation"] = cos_corr
-            p["lead_lag_score"] = lead_score
-            p["correlation_raw"] = corr
+        # ----------------------------------------------------
+        # Normalization (all four score columns in one pass)
+        # ----------------------------------------------------
 
-            corr_raws.append(corr)
+        R = np.column_stack((z_anomaly_raws, mahal_raws, energy_raws, corr_raws))
 
+        # Scale each column to its max; all-zero columns stay zero
+        mx = R.max(axis=0)
+        Rn = np.divide(R, mx, out=np.zeros_like(R), where=mx > 0)
 
-        # ----------------------------------------------------
-        # Normalization helpers
-        # ----------------------------------------------------
+        z_norm, m_norm, e_norm, c_norm = Rn.T
 
-        def _normalize(vals):
-            arr = np.asarray(vals, dtype=float)
+        anomaly_norm = 0.5 * z_norm + 0.5 * m_norm
 
-            if arr.size == 0:
-                return [0.0]
 
-            mx = arr.max()
-            if mx <= 0:
-                return [0.0 for _ in arr]
+        severity_boost = 1.25 if spike_cpu > 85 or spike_ram > 80 else 1.0
 
-            return [float(v / mx) for v in arr]
+        # Anomaly is the z / Mahalanobis average, so the whole blend is
+        # one mat-vec over the normalized score columns
+        blend = np.array([
+            0.5 * self.weight_anomaly,
+            0.5 * self.weight_anomaly,
+            self.weight_energy,
+            self.weight_correlation,
+        ])
 
+        finals = severity_boost * (Rn @ blend)
 
-        z_norm = _normalize(z_anomaly_raws)
-        m_norm = _normalize(mahal_raws)
-        e_norm = _normalize(energy_raws)
-        c_norm = _normalize(corr_raws)
+        max_final = max(float(finals.max()), 1e-9)
 
+        final_scores = [round(min(1.0, v / max_final), 4) for v in finals.tolist()]
 
-        anomaly_norm = [
-            0.5 * z + 0.5 * m
-            for z, m in zip(z_norm, m_norm)
-        ]
+        # Stable, so tied scores keep first-seen order
+        order = np.argsort(-np.asarray(final_scores), kind="stable")[:top_k]
 
 
-        severity_boost = 1.25 if spike_cpu > 85 or spike_ram > 80 else 1.0
+        # ----------------------------------------------------
+        # Reassemble row dicts for the returned candidates only
+        # ----------------------------------------------------
 
-        finals = []
+        ranked = []
 
-        for p, a, e, c in zip(pid_rows, anomaly_norm, e_norm, c_norm):
+        for i in order.tolist():
+            ranked.append({
+                "pid": pids[i],
+                "name": names[i],
+                "cmdline": cmdlines[i],
 
-            raw = severity_boost * (
-                self.weight_anomaly * a +
-                self.weight_energy * e +
-                self.weight_correlation * c
-            )
+                "cpu_pct": float(cpu_col[i]),
+                "ram_pct": float(ram_col[i]),
 
-            p["anomaly_score"] = round(a, 4)
-            p["energy_score"] = round(e, 4)
-            p["correlation_score"] = round(c, 4)
+                "event_rate": int(F[i, FEATURE_INDEX["event_rate"]]),
+                "thread_rate": int(F[i, FEATURE_INDEX["thread_rate"]]),
+                "cpu_samples": int(F[i, FEATURE_INDEX["cpu_samples"]]),
+                "page_faults": int(F[i, FEATURE_INDEX["page_faults"]]),
+                "gc_events": int(F[i, FEATURE_INDEX["gc_events"]]),
 
-            finals.append(raw)
+                "net_bytes": float(net_bytes[i]),
+                "disk_bytes": float(disk_bytes[i]),
 
+                "net_bytes_log": float(F[i, FEATURE_INDEX["net_bytes_log"]]),
+                "disk_bytes_log": float(F[i, FEATURE_INDEX["disk_bytes_log"]]),
 
-        max_final = max(finals) if finals else 1.0
-        max_final = max(max_final, 1e-9)
+                "z_anomaly": float(z_anomaly_raws[i]),
+                "mahalanobis": float(mahal_raws[i]),
+                "energy_raw": float(energy_raws[i]),
 
-        ranked = []
+                "cosine_correlation": float(cos_corrs[i]),
+                "lead_lag_score": float(lead_scores[i]),
+                "correlation_raw": float(corr_raws[i]),
 
-        for p, v in zip(pid_rows, finals):
-            p["final_score"] = round(min(1.0, v / max_final), 4)
-            ranked.append(p)
+                "anomaly_score": round(float(anomaly_norm[i]), 4),
+                "energy_score": round(float(e_norm[i]), 4),
+                "correlation_score": round(float(c_norm[i]), 4),
 
-        ranked.sort(key=lambda x: x["final_score"], reverse=True)
+                "final_score": final_scores[i],
+            })
 
-        return ranked[:top_k]
+        return ranked
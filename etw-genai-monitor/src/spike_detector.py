@@ -1,7 +1,18 @@
+import math
 from collections import deque
-from statistics import mean, pstdev
 from datetime import datetime, timezone, timedelta
 
+import numpy as np
+
+
+# Baseline channels stored per sample, one row each in the ring
+_KEYS = ("cpu", "ram")
+_ROW = {key: i for i, key in enumerate(_KEYS)}
+
+# Indexed by (cpu over threshold) << 1 | (ram over threshold). A confirmed
+# spike always has one of them over; index 0 keeps the old "ram" default.
+_SPIKE_TYPES = ("ram", "ram", "cpu", "mixed")
+
 
 class SpikeDetector:
     """
@@ -26,7 +37,18 @@ class SpikeDetector:
         ram_threshold=80.0,
         cooldown_seconds=45,
     ):
-        self.window = deque(maxlen=int(baseline_window / sample_interval))
+        # Baseline ring: samples (for their ts) plus their cpu / ram values
+        # as NumPy rows, with running sums so mean / stdev are O(1).
+        self._cap = max(int(baseline_window / sample_interval), 1)
+        self._samples = [None] * self._cap
+        self._vals = np.zeros((len(_KEYS), self._cap), dtype=np.float64)
+        self._head = 0
+        self._count = 0
+        self._since_resync = 0
+
+        self._sum = np.zeros(len(_KEYS), dtype=np.float64)
+        self._sumsq = np.zeros(len(_KEYS), dtype=np.float64)
+
         self.sample_interval = sample_interval
         self.z = z_score
         self.deriv_thresh = derivative_threshold
@@ -43,28 +65,85 @@ class SpikeDetector:
             maxlen=int(confirm_seconds / sample_interval)
         )
 
+        # Number of True entries in confirm_buffer, kept in step with it
+        self._confirm_hits = 0
+
         self.last_spike_time = None
 
     # -----------------------------------------------------
 
     def add_sample(self, sample):
-        self.window.append(sample)
+        new = np.array([float(sample[key]) for key in _KEYS])
+        slot = self._head
+
+        if self._count == self._cap:
+            old = self._vals[:, slot]
+            self._sum -= old
+            self._sumsq -= old * old
+        else:
+            self._count += 1
+
+        self._samples[slot] = sample
+        self._vals[:, slot] = new
+        self._head = (slot + 1) % self._cap
+
+        self._sum += new
+        self._sumsq += new * new
+
+        # Re-sum from the ring once per lap so subtract/add rounding
+        # error can never accumulate
+        self._since_resync += 1
+        if self._since_resync >= self._cap:
+            self._since_resync = 0
+            live = self._vals[:, :self._count]
+            self._sum = live.sum(axis=1)
+            self._sumsq = (live * live).sum(axis=1)
+
         self.last_cpu_values.append(sample["cpu"])
 
-        self.confirm_buffer.append(
+        over = (
             sample["cpu"] >= self.cpu_threshold or
             sample["ram"] >= self.ram_threshold
         )
 
+        buf = self.confirm_buffer
+        if buf.maxlen:
+            if len(buf) == buf.maxlen and buf[0]:
+                self._confirm_hits -= 1
+
+            buf.append(over)
+            self._confirm_hits += over
+
     # -----------------------------------------------------
 
     def _mu_sigma(self, key="cpu"):
         # ✅ FIX 2
-        if len(self.window) < 10:
+        if self._count < 10:
             return None, None
 
-        vals = [s[key] for s in self.window]
-        return mean(vals), pstdev(vals)
+        row = _ROW[key]
+        mu = self._sum[row] / self._count
+        var = self._sumsq[row] / self._count - mu * mu
+
+        return float(mu), math.sqrt(max(float(var), 0.0))
+
+    # -----------------------------------------------------
+
+    def _latest_at_or_above(self, key, threshold):
+        """Most recent baseline sample with sample[key] >= threshold."""
+        n = self._count
+        hits = np.flatnonzero(self._vals[_ROW[key], :n] >= threshold)
+
+        if hits.size == 0:
+            return None
+
+        # Slot age order: (slot - head) % cap grows toward the newest
+        newest = hits[np.argmax((hits - self._head) % self._cap)]
+
+        return self._samples[newest]
+
+    def _latest(self):
+        return self._samples[(self._head - 1) % self._cap]
 
     # -----------------------------------------------------
 
@@ -76,12 +155,8 @@ class SpikeDetector:
 
         threshold = mu + self.z * sigma
 
-        # Scan backwards for spike seed
-        for s in reversed(self.window):
-            if s[key] >= threshold:
-                return s
-
-        return None
+        # Newest sample over threshold is the spike seed
+        return self._latest_at_or_above(key, threshold)
 
     # -----------------------------------------------------
 
@@ -100,9 +175,7 @@ class SpikeDetector:
         if avg_slope > self.deriv_thresh:
             start_value = lv[-(self.deriv_len + 1)]
 
-            for s in reversed(self.window):
-                if s["cpu"] >= start_value:
-                    return s
+            return self._latest_at_or_above("cpu", start_value)
 
         return None
 
@@ -117,7 +190,12 @@ class SpikeDetector:
     # -----------------------------------------------------
 
     def check(self):
-        if not self.window or not self._cooldown_passed():
+        # Cheapest gate first: nothing can fire until every sample in the
+        # confirmation window is over threshold (the common no-spike path)
+        if self._confirm_hits != self.confirm_buffer.maxlen:
+            return False, {}
+
+        if not self._count or not self._cooldown_passed():
             return False, {}
 
         cand_cpu = self._candidate_zscore("cpu")
@@ -126,37 +204,31 @@ class SpikeDetector:
 
         cand = cand_cpu or cand_ram or cand_deriv
 
-        if (
-            cand
-            and len(self.confirm_buffer) == self.confirm_buffer.maxlen
-            and all(self.confirm_buffer)
-        ):
-            latest = self.window[-1]
-
-            spike_type = (
-                "mixed"
-                if latest["cpu"] >= self.cpu_threshold and latest["ram"] >= self.ram_threshold
-                else "cpu"
-                if latest["cpu"] >= self.cpu_threshold
-                else "ram"
-            )
+        if cand:
+            latest = self._latest()
+            cpu = latest["cpu"]
+            ram = latest["ram"]
+
+            spike_type = _SPIKE_TYPES[
+                (cpu >= self.cpu_threshold) << 1 | (ram >= self.ram_threshold)
+            ]
 
             severity = max(
                 0.0,
-                (latest["cpu"] - self.cpu_threshold)
-                + (latest["ram"] - self.ram_threshold)
+                (cpu - self.cpu_threshold) + (ram - self.ram_threshold)
             )
 
             self.last_spike_time = datetime.now(timezone.utc)
             self.confirm_buffer.clear()
+            self._confirm_hits = 0
 
             info = {
                 "start_time": cand["ts"],
                 "confirm_time": self.last_spike_time.isoformat(),
                 "spike_type": spike_type,
                 "severity_score": round(severity, 2),
-                "cpu_at_confirm": latest["cpu"],
-                "ram_at_confirm": latest["ram"],
+                "cpu_at_confirm": cpu,
+                "ram_at_confirm": ram,
             }
 
             return True, info
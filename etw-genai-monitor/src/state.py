@@ -1,9 +1,12 @@
 from dataclasses import dataclass, asdict
 from threading import Lock
-from datetime import datetime, timezone, timedelta
+import time
+from datetime import datetime, timezone
 from typing import List, Dict, Any
 from collections import deque
 
+import numpy as np
+
 # ------------------------------------------
 # CONFIG
 # ------------------------------------------
@@ -27,7 +30,7 @@ def iso_now() -> str:
 # Data Models
 # ------------------------------------------
 
-@dataclass
+@dataclass(slots=True)
 class SpikeRecord:
     id: int
     detected_at: str
@@ -60,13 +63,31 @@ class MonitorState:
         self._spikes: deque[SpikeRecord] = deque(maxlen=MAX_SPIKES_HISTORY)
         self._next_spike_id: int = 1
 
+        # id -> record for every spike still in the deque (O(1) lookups)
+        self._spike_by_id: Dict[int, SpikeRecord] = {}
+
         # --------------------------
         # ✅ LIVE TELEMETRY BUFFER
         # --------------------------
-        self._telemetry: deque[Dict[str, Any]] = deque(maxlen=MAX_TELEMETRY_BUFFER)
+        # Fixed-size ring of parallel columns (no dict per sample); the
+        # epoch column lets window queries compare floats, not ISO strings
+        self._tel_cap = MAX_TELEMETRY_BUFFER
+        self._tel_epoch = np.zeros(self._tel_cap, dtype=np.float64)
+        self._tel_cpu = np.zeros(self._tel_cap, dtype=np.float64)
+        self._tel_ram = np.zeros(self._tel_cap, dtype=np.float64)
+        self._tel_ts: List[str] = [""] * self._tel_cap
+        self._tel_head = 0
+        self._tel_count = 0
+
+        # Bumped on every write; read-side caches use it as a validator
+        self._rev: int = 0
 
         self.lock = Lock()
 
+    def revision(self) -> int:
+        """Monotonic counter of state mutations."""
+        return self._rev
+
     # ----------------------------------
     # TELEMETRY STORAGE (NEW)
     # ----------------------------------
@@ -75,43 +96,64 @@ class MonitorState:
         """
         Append a telemetry sample to the rolling history buffer.
         """
-        sample = {
-            "ts": iso_now(),
-            "cpu": float(cpu),
-            "ram": float(ram),
-        }
+        now = time.time()
+        ts = datetime.fromtimestamp(now, timezone.utc).isoformat()
+        cpu = float(cpu)
+        ram = float(ram)
 
         with self.lock:
-            self._telemetry.append(sample)
+            i = self._tel_head
+
+            self._tel_epoch[i] = now
+            self._tel_cpu[i] = cpu
+            self._tel_ram[i] = ram
+            self._tel_ts[i] = ts
+
+            self._tel_head = (i + 1) % self._tel_cap
+            self._tel_count = min(self._tel_count + 1, self._tel_cap)
+            self._rev += 1
 
     def get_latest_telemetry(self) -> Dict[str, Any] | None:
         """
         Returns the most recent telemetry sample.
         """
         with self.lock:
-            if not self._telemetry:
+            if not self._tel_count:
                 return None
 
-            return dict(self._telemetry[-1])
+            i = (self._tel_head - 1) % self._tel_cap
+
+            return {
+                "ts": self._tel_ts[i],
+                "cpu": float(self._tel_cpu[i]),
+                "ram": float(self._tel_ram[i]),
+            }
 
     def get_telemetry_window(self, seconds: int) -> List[Dict[str, Any]]:
         """
         Return telemetry samples within the last N seconds.
         """
-        cutoff = datetime.now(timezone.utc) - timedelta(seconds=seconds)
-
-        samples = []
+        cutoff = time.time() - seconds
 
         with self.lock:
-            for item in reversed(self._telemetry):
-                ts = datetime.fromisoformat(item["ts"])
+            n = self._tel_count
 
-                if ts < cutoff:
-                    break
+            # Ring slots oldest -> newest; fancy indexing copies them out
+            idx = (self._tel_head - n + np.arange(n)) % self._tel_cap
 
-                samples.insert(0, dict(item))
+            epoch = self._tel_epoch[idx]
+            cpu = self._tel_cpu[idx].tolist()
+            ram = self._tel_ram[idx].tolist()
+            ts = [self._tel_ts[i] for i in idx.tolist()]
 
-        return samples
+        # Newest contiguous run inside the window
+        older = np.flatnonzero(epoch < cutoff)
+        start = int(older[-1]) + 1 if older.size else 0
+
+        return [
+            {"ts": ts[i], "cpu": cpu[i], "ram": ram[i]}
+            for i in range(start, n)
+        ]
 
     # ----------------------------------
     # SPIKE STORAGE
@@ -136,8 +178,14 @@ class MonitorState:
                 severity_score=float(info.get("severity_score", 0.0)),
             )
 
+            # The deque is about to drop its oldest record; drop its index too
+            if len(self._spikes) == self._spikes.maxlen:
+                self._spike_by_id.pop(self._spikes[0].id, None)
+
             self._spikes.append(spike)
+            self._spike_by_id[spike.id] = spike
             self._next_spike_id += 1
+            self._rev += 1
 
             return spike
 
@@ -149,50 +197,61 @@ class MonitorState:
         if not isinstance(events, list):
             return
 
+        limited = events[-MAX_ATTACHED_EVENTS:]
+
         with self.lock:
-            for s in self._spikes:
-                if s.id == spike_id:
-                    limited = events[-MAX_ATTACHED_EVENTS:]
-                    s.attached_event_count = len(events)
-                    s.etw_events = limited
-                    break
+            s = self._spike_by_id.get(spike_id)
+
+            if s is not None:
+                s.attached_event_count = len(events)
+                s.etw_events = limited
+                self._rev += 1
 
     def attach_rca(self, spike_id: int, rca: Dict):
         if not isinstance(rca, dict):
             return
 
+        rca = dict(rca)
+
         with self.lock:
-            for s in self._spikes:
-                if s.id == spike_id:
-                    s.rca = dict(rca)
-                    break
+            s = self._spike_by_id.get(spike_id)
+
+            if s is not None:
+                s.rca = rca
+                self._rev += 1
 
     # ----------------------------------
     # READ APIS
     # ----------------------------------
 
+    # Writers only ever *replace* a record's rca / etw_events, never
+    # mutate them in place, so readers can copy outside the lock.
+
     def get_spikes(self):
         """Returns all spike records as dictionaries, newest first."""
         with self.lock:
-            return [asdict(s) for s in reversed(self._spikes)]
+            snap = list(self._spikes)
+
+        return [asdict(s) for s in reversed(snap)]
 
     def get_spike(self, spike_id: int):
         """Returns a single spike record by ID."""
         with self.lock:
-            for s in self._spikes:
-                if s.id == spike_id:
-                    return asdict(s)
+            found = self._spike_by_id.get(spike_id)
 
-        return None
+        return asdict(found) if found is not None else None
 
     def get_latest_rca(self):
         """Returns the RCA from the newest spike that has one."""
+        rca = None
+
         with self.lock:
             for s in reversed(self._spikes):
                 if s.rca:
-                    return dict(s.rca)
+                    rca = s.rca
+                    break
 
-        return None
+        return dict(rca) if rca is not None else None
 
 
 # ------------------------------------------
@@ -1,6 +1,75 @@
-from datetime import datetime, timezone
+import atexit
+import os
+import sys
+import threading
+import time
+
+# Verbose diagnostics (raw Gemini payloads etc.); off by default
+DEBUG = os.getenv("GENAI_MONITOR_DEBUG", "").strip().lower() in ("1", "true", "yes", "on")
+
+# Lines are written unflushed; a background thread flushes this often
+FLUSH_INTERVAL_SECONDS = 0.1
+
+# (epoch second, "YYYY-MM-DDTHH:MM:SS") — the formatted part only changes
+# once a second, so it is reused across log lines
+_ts_prefix = (-1, "")
+
+
+def _timestamp() -> str:
+    """UTC ISO 8601 timestamp, same shape as datetime.isoformat()."""
+    global _ts_prefix
+
+    now = time.time()
+    sec = int(now)
+
+    if _ts_prefix[0] != sec:
+        _ts_prefix = (sec, time.strftime("%Y-%m-%dT%H:%M:%S", time.gmtime(sec)))
+
+    return f"{_ts_prefix[1]}.{int((now - sec) * 1e6):06d}+00:00"
+
+
+def _flush():
+    try:
+        sys.stdout.flush()
+    except Exception:
+        pass
+
+
+def _flush_loop():
+    while True:
+        time.sleep(FLUSH_INTERVAL_SECONDS)
+        _flush()
+
+
+_flusher_started = False
+_flusher_lock = threading.Lock()
+
+
+def _start_flusher():
+    """Start the background flush thread once, on the first log line."""
+    global _flusher_started
+
+    with _flusher_lock:
+        if _flusher_started:
+            return
+
+        threading.Thread(target=_flush_loop, name="log-flush", daemon=True).start()
+        _flusher_started = True
+
+
+atexit.register(_flush)
+
 
 def log(msg: str):
-    ts = datetime.now(timezone.utc).isoformat()
-    print(f"[{ts}] {msg}", flush=True)
+    if not _flusher_started:
+        _start_flusher()
+
+    # One write per line so lines from different threads don't interleave
+    sys.stdout.write(f"[{_timestamp()}] {msg}\n")
+
 
+def debug(msg: str):
+    """log() only when GENAI_MONITOR_DEBUG is set. Guard expensive
+    message formatting with `if DEBUG:` at the call site."""
+    if DEBUG:
+        log(msg)
@@ -12,12 +12,35 @@ class Program
 {
     static void Main(string[] args)
     {
+        // --------------------------------------------------
+        // SESSION BUFFERS + FLUSH CADENCE
+        // --------------------------------------------------
+        // Small/few ETW buffers drop events exactly when the rate peaks
+        // (during a spike), and real-time delivery otherwise waits for a
+        // buffer to fill or the ~1 s flush timer.
+
+        int bufferKb = ArgInt(args, "--buffer-kb", 128);
+        int bufferCount = ArgInt(args, "--buffer-count", 256);
+        int flushMs = ArgInt(args, "--flush-ms", 100);
+
+        // stdout is block-buffered and flushed on the same timer instead
+        // of once per event line
+        var stdout = new StreamWriter(Console.OpenStandardOutput(), bufferSize: 64 * 1024)
+        {
+            AutoFlush = false
+        };
+        Console.SetOut(TextWriter.Synchronized(stdout));
+
         using var session = new TraceEventSession(
             $"GenAI-Kernel-{Guid.NewGuid()}"
         );
 
         session.StopOnDispose = true;
 
+        // Must be set before any provider is enabled
+        session.BufferQuantumKB = bufferKb;
+        session.BufferSizeMB = Math.Max(1, bufferKb * bufferCount / 1024);
+
         Console.CancelKeyPress += delegate
         {
             session.Stop();
@@ -50,6 +73,19 @@ class Program
 
         Console.WriteLine("ETW tracer started");
 
+        using var flushTimer = new System.Threading.Timer(_ =>
+        {
+            try
+            {
+                session.Flush();
+                Console.Out.Flush();
+            }
+            catch
+            {
+                // Session stopping; the final flush below covers the tail
+            }
+        }, null, flushMs, flushMs);
+
         var kernel = session.Source.Kernel;
 
         // --------------------------------------------------
@@ -115,6 +151,23 @@ class Program
         };
 
         session.Source.Process();
+
+        Console.Out.Flush();
+    }
+
+    // ===========================================================
+    // ✅ INTEGER CLI OPTION ("--name value")
+    // ===========================================================
+
+    static int ArgInt(string[] args, string name, int fallback)
+    {
+        int i = Array.IndexOf(args, name);
+
+        if (i >= 0 && i + 1 < args.Length &&
+            int.TryParse(args[i + 1], out var value) && value > 0)
+            return value;
+
+        return fallback;
     }
 
     // ===========================================================